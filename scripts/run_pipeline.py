@@ -1,11 +1,12 @@
-import os 
+import os
 import sys
 import time
+import logging
 import argparse
 import pandas as pd
 import mlflow
 import mlflow.sklearn
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedShuffleSplit
 from sklearn.metrics import (classification_report, precision_score, recall_score,f1_score,roc_auc_score)
 from xgboost import XGBClassifier
 
@@ -16,7 +17,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 # Local modules - Core pipeline components
 from src.data.load_data import load_data                         # Data loading with error handling
 from src.data.preprocess import preprocess_data                  # Basic data cleaning
-from src.features.build_features import build_features           # Feature engineering (CRITICAL for model performance)
+from src.features.build_features import build_features, downcast_numeric_frame  # Feature engineering (CRITICAL for model performance)
 from src.utils.validate_dataset import validate_telco_dataset    # Data quality validation
 
 def main(args):
@@ -24,6 +25,11 @@ def main(args):
     Main training pipeline function that orchestrates the complete ML workflow.
     
     """
+    # === Logging Setup ===
+    # The validation/feature modules log through the logging module (lazy
+    # evaluation on the hot path); surface their INFO messages on the console
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # === MLflow Setup - ESSENTIAL for experiment tracking ===
     # Configure MLflow to use local file-based tracking (not a tracking server)
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -74,8 +80,13 @@ def main(args):
         if target not in df.columns:
             raise ValueError(f"Target column '{target}' not found in data")
         
+        # Artifacts directory must exist before feature engineering so the
+        # fitted one-hot encoder can be persisted for serving consistency
+        artifacts_dir = os.path.join(project_root, "artifacts")
+        os.makedirs(artifacts_dir, exist_ok=True)
+
         # Apply feature engineering transformations
-        df_enc = build_features(df, target_col=target)  # Binary encoding + one-hot encoding
+        df_enc = build_features(df, target_col=target, artifacts_dir=artifacts_dir)  # Binary encoding + one-hot encoding
 
         # IMPORTANT: Convert boolean columns to integers for XGBoost compatibility
         for c in df_enc.select_dtypes(include=["bool"]).columns:
@@ -85,8 +96,6 @@ def main(args):
         # === CRITICAL: Save Feature Metadata for Serving Consistency ===
         # This ensures serving pipeline uses exact same features in exact same order
         import json, joblib
-        artifacts_dir = os.path.join(project_root, "artifacts")
-        os.makedirs(artifacts_dir, exist_ok=True)
 
         # Get feature columns (exclude target)
         feature_cols = list(df_enc.drop(columns=[target]).columns)
@@ -106,20 +115,35 @@ def main(args):
         }
         joblib.dump(preprocessing_artifact, os.path.join(artifacts_dir, "preprocessing.pkl"))
         mlflow.log_artifact(os.path.join(artifacts_dir, "preprocessing.pkl"))
+
+        # Log the encoding artifacts written by build_features so serving can
+        # load the exact training mappings from the model directory
+        for artifact_name in ("binary_schema.parquet", "onehot_encoder.pkl"):
+            artifact_path = os.path.join(artifacts_dir, artifact_name)
+            if os.path.exists(artifact_path):
+                mlflow.log_artifact(artifact_path)
         print(f"✅ Saved {len(feature_cols)} feature columns for serving consistency")
 
         # === STAGE 4: Train/Test Split ===
+        # Shrink numeric features (float64->float32, int64->int8/16/32) before
+        # splitting so the train/test copies and XGBoost see half the bytes
+        df_enc = downcast_numeric_frame(df_enc, target_col=target)
+
         print("📊 Splitting data...")
         X = df_enc.drop(columns=[target])  # Feature matrix
         y = df_enc[target]                 # Target vector
         
-        # Stratified split to maintain class distribution in both sets
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, 
+        # Stratified split to maintain class distribution in both sets.
+        # StratifiedShuffleSplit hands back index arrays, so each split is one
+        # positional take() instead of train_test_split's per-object slicing.
+        splitter = StratifiedShuffleSplit(
+            n_splits=1,
             test_size=args.test_size,    # Default: 20% for testing
-            stratify=y,                  # Maintain class balance
             random_state=42              # Reproducible splits
         )
+        train_idx, test_idx = next(splitter.split(X, y))
+        X_train, X_test = X.take(train_idx), X.take(test_idx)
+        y_train, y_test = y.take(train_idx), y.take(test_idx)
         print(f"✅ Train: {X_train.shape[0]} samples | Test: {X_test.shape[0]} samples")
 
         # === CRITICAL: Handle Class Imbalance ===
@@ -144,6 +168,8 @@ def main(args):
             colsample_bytree=0.98,  # Sample ratio of features for each tree
             
             # Performance parameters
+            tree_method="hist",     # Histogram-based split finding (much faster than exact)
+            device=args.device,     # "cpu" by default, pass --device cuda for GPU training
             n_jobs=-1,              # Use all CPU cores
             random_state=42,        # Reproducible results
             eval_metric="logloss",  # Evaluation metric
@@ -218,6 +244,8 @@ if __name__ == "__main__":
     p.add_argument("--threshold", type=float, default=0.35)
     p.add_argument("--test_size", type=float, default=0.2)
     p.add_argument("--experiment", type=str, default="Telco Churn")
+    p.add_argument("--device", type=str, default="cpu",
+                   help="XGBoost device, e.g. 'cpu' or 'cuda' for GPU training")
     p.add_argument("--mlflow_uri", type=str, default=None,
                     help="override MLflow tracking URI, else uses project_root/mlruns")
     
@@ -1,108 +1,299 @@
+import os
+import logging
+import joblib
+import numpy as np
 import pandas as pd
+from sklearn.preprocessing import OneHotEncoder
 
-def _map_binary_series(s:pd.Series) -> pd.Series:
-    """
-    Apply deterministic binary encoding to 2-category features.
-    
-    This function implements the core binary encoding logic that converts
-    categorical features with exactly 2 values into 0/1 integers. The mappings
-    are deterministic and must be consistent between training and serving.
+log = logging.getLogger(__name__)
+
+# Above this many one-hot output columns the encoded block is kept as a
+# scipy CSR matrix (wrapped in sparse pandas columns) instead of a dense
+# uint8 buffer - wide mostly-zero dummy blocks waste memory as dense arrays.
+# The Telco dataset stays well below this, so it keeps the dense path.
+_DENSE_ONEHOT_MAX_COLS = 64
+
+# Numba is optional - the encoding falls back to plain NumPy compares when
+# it isn't installed, producing identical output
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+if _HAS_NUMBA:
+    @njit(cache=True)
+    def _binary_encode_codes(codes, positive_code):
+        """
+        JIT-compiled 0/1 encoding of categorical codes in one fused pass.
+
+        Strings can't be processed in nopython mode, so the kernel runs on
+        the integer category codes. Missing values (code -1) encode to 0,
+        folding the NaN-fill cleanup into the same loop.
+
+        """
+        n = codes.shape[0]
+        out = np.empty(n, dtype=np.int8)
+        for i in range(n):
+            out[i] = 1 if codes[i] == positive_code else 0
+        return out
+
+    @njit(cache=True, parallel=True)
+    def _binary_encode_batch(codes, positive_codes):
+        """
+        Parallel 0/1 encoding of every binary column in a single call.
+
+        codes is an (n_rows, n_cols) matrix of category codes and
+        positive_codes[j] is the code that maps to 1 in column j. Columns
+        are distributed across threads with prange; missing values (code
+        -1) encode to 0 like in the single-column kernel.
+
+        """
+        n_rows, n_cols = codes.shape
+        out = np.empty((n_rows, n_cols), dtype=np.int8)
+        for j in prange(n_cols):
+            positive_code = positive_codes[j]
+            for i in range(n_rows):
+                out[i, j] = 1 if codes[i, j] == positive_code else 0
+        return out
 
+def _positive_value(values:set):
     """
-    values = list(pd.Series(s.dropna().unique()).astype(str))
-    values = set(values)
+    Pick the category that maps to 1 for a 2-category feature.
 
+    Returns None for non-binary value sets so callers can fall back to
+    one-hot encoding.
+
+    """
     # Yes/No mapping (most common pattern in telecom data)
     if values == {"Yes", "No"}:
-        return s.map({"No": 0, "Yes": 1}).astype("Int64")
-    
+        return "Yes"
+
     # Gender mapping (For Demographic Features)
     if values == {"Male","Female"}:
-        return s.map({"Female":0, "Male":1}).astype("Int64")
-    
+        return "Male"
+
     # === GENERIC BINARY MAPPING ===
     # For any other 2-category feature, use stable alphabetical ordering
-
     if len(values) == 2:
         # Sort values to ensure consistent mapping across runs
-        sorted_vals = sorted(values)
-        mapping = {sorted_vals[0]: 0, sorted_vals[1]: 1}
-        return s.astype(str).map(mapping).astype("Int64")
-    
+        return sorted(values)[1]
+
+    return None
+
+def _map_binary_series(s:pd.Series) -> pd.Series:
+    """
+    Apply deterministic binary encoding to 2-category features.
+
+    This function implements the core binary encoding logic that converts
+    categorical features with exactly 2 values into 0/1 integers. The mappings
+    are deterministic and must be consistent between training and serving.
+
+    Encoding happens as a single vectorized comparison on the underlying
+    NumPy array (one C-level pass) instead of a Python-level dict map.
+    Category-dtype columns compare their precomputed integer codes instead
+    of re-hashing the strings. Missing values encode straight to 0, so no
+    separate NaN-fill pass is needed afterwards.
+
+    """
+    # === CATEGORY DTYPE FAST PATH ===
+    # Compare int8/int16 codes against the positive category's code
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        categories = s.cat.categories
+        positive = _positive_value(set(categories.astype(str)))
+        if positive is None:
+            return s
+        codes = s.cat.codes.to_numpy()
+        positive_code = categories.get_loc(positive)
+        if _HAS_NUMBA:
+            return _binary_encode_codes(codes, positive_code)
+        # Missing values (code -1) never match the positive code, so they
+        # encode to 0 in the same compare
+        return (codes == positive_code).astype(np.int8)
+
+    arr = s.to_numpy()
+    mask = s.isna().to_numpy()
+    positive = _positive_value(set(pd.Series(arr[~mask]).astype(str)))
 
     # === NON-BINARY FEATURES ===
     # Return unchanged - will be handled by one-hot encoding
-    return s
+    if positive is None:
+        return s
 
-def build_features(df:pd.DataFrame, target_col:str = "Churn")  -> pd.DataFrame:
+    # One vectorized compare over the whole column; NaN never matches the
+    # positive value, so missing entries encode to 0
+    return (arr == positive).astype(np.int8)
+
+def downcast_numeric_frame(df:pd.DataFrame, target_col:str = "Churn") -> pd.DataFrame:
+    """
+    Downcast numeric feature columns to the narrowest safe dtype.
+
+    float64 becomes float32 and int64 shrinks to int8/int16/int32 depending
+    on the observed value range, roughly halving the memory XGBoost has to
+    stream during training. The target column and sparse one-hot columns
+    (already uint8) are left untouched.
+
+    """
+    for c in df.columns:
+        if c == target_col:
+            continue
+        dtype = df[c].dtype
+        # Sparse one-hot columns report as integer dtype but pd.to_numeric
+        # cannot downcast a SparseDtype; they are already uint8 anyway
+        if isinstance(dtype, pd.SparseDtype):
+            continue
+        if pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+            df[c] = df[c].astype(np.float32)
+        elif pd.api.types.is_integer_dtype(dtype):
+            df[c] = pd.to_numeric(df[c], downcast="integer")
+    return df
+
+def build_features(df:pd.DataFrame, target_col:str = "Churn", artifacts_dir:str = None)  -> pd.DataFrame:
     """
     Apply complete feature engineering pipeline for training data.
-    
+
     This is the main feature engineering function that transforms raw customer data
     into ML-ready features. The transformations must be exactly replicated in the
     serving pipeline to ensure prediction accuracy.
 
-    """
+    If artifacts_dir is given, the fitted one-hot encoder is saved there so the
+    serving pipeline can reuse the exact same category-to-column mapping.
 
-    df = df.copy()
+    """
 
-    print(f"🔧 Starting feature engineering on {df.shape[1]} columns...")
+    log.info("🔧 Starting feature engineering on %d columns...", df.shape[1])
 
     # === STEP 1: Identify feature types ===
-    # Find categorical columns excluding target col
-    cat_cols = [c for c in df.select_dtypes(include=["object"]).columns if c != target_col]
-    num_cols = [c for c in df.select_dtypes(include=["int64","float64"]).columns]
+    # One pass over the cached dtype map instead of a select_dtypes scan per kind
+    dtype_map = df.dtypes
+    cat_cols = [c for c, dt in dtype_map.items() if dt == object and c != target_col]
+    num_cols = [c for c, dt in dtype_map.items() if dt in (np.dtype("int64"), np.dtype("float64"))]
 
-    print(f"📊 Found {len(cat_cols)} categorical and {len(num_cols)} numeric columns")
+    log.info("📊 Found %d categorical and %d numeric columns", len(cat_cols), len(num_cols))
+
+    # Convert to category dtype once so the nunique/unique/one-hot steps below
+    # all run on precomputed integer codes instead of re-hashing the strings.
+    # Only the categorical columns are materialized - the caller's frame is
+    # never copied or mutated; output columns are collected in `out` instead.
+    cat_frame = df[cat_cols].astype("category")
 
     # === STEP 2: Split Categorical by Cardinality ===
     # Binary features (exactly 2 unique values) get binary encoding
     # Multi-category features (>2 unique values) get one-hot encoding
-    binary_cols = [c for c in cat_cols if df[c].dropna().nunique() == 2]
-    multi_cols = [c for c in cat_cols if df[c].dropna().nunique() > 2]
+    # Single nunique() pass over all categorical columns instead of one scan per column
+    cardinality = cat_frame.nunique(dropna=True)
+    binary_cols = cardinality.index[cardinality == 2].tolist()
+    multi_cols = cardinality.index[cardinality > 2].tolist()
 
-    print(f"🔢 Binary features: {len(binary_cols)} | Multi-category features: {len(multi_cols)}")
+    log.info("🔢 Binary features: %d | Multi-category features: %d", len(binary_cols), len(multi_cols))
 
-    if binary_cols:
-        print(f"Binary: {binary_cols}")
-    if multi_cols:
-        print(f"Multi-category: {multi_cols}")
+    # Guard the column-list dumps so the list reprs are never built when
+    # INFO logging is disabled
+    if log.isEnabledFor(logging.INFO):
+        if binary_cols:
+            log.info("Binary: %s", binary_cols)
+        if multi_cols:
+            log.info("Multi-category: %s", multi_cols)
 
     # === STEP 3: Apply Binary Encoding ===
-    # Convert 2-category features to 0/1 using deterministic mappings
-    for c in binary_cols:
-        original_dtype = df[c].dtype
-        df[c] = _map_binary_series(df[c].astype(str))
-        print(f"✅ {c}: {original_dtype} → binary (0/1)")
+    # Convert 2-category features to 0/1 using deterministic mappings; the
+    # encoding already emits clean int8 with missing values filled as 0, so
+    # no separate cleanup pass is needed. Everything that isn't one-hot
+    # encoded passes through by reference, preserving the original column order.
+    out = {}
+    binary_set = set(binary_cols)
+    multi_set = set(multi_cols)
+
+    # With Numba available, all binary columns are encoded in one parallel
+    # kernel call over a stacked codes matrix instead of column by column
+    encoded_binary = {}
+    if _HAS_NUMBA and binary_cols:
+        codes = np.column_stack(
+            [cat_frame[c].cat.codes.to_numpy() for c in binary_cols]
+        ).astype(np.int16)
+        positive_codes = np.array(
+            [cat_frame[c].cat.categories.get_loc(
+                _positive_value(set(cat_frame[c].cat.categories.astype(str))))
+             for c in binary_cols],
+            dtype=np.int16,
+        )
+        batch = _binary_encode_batch(codes, positive_codes)
+        encoded_binary = {c: batch[:, j] for j, c in enumerate(binary_cols)}
+    elif binary_cols:
+        encoded_binary = {c: _map_binary_series(cat_frame[c]) for c in binary_cols}
+
+    # Single bulk assignment in original column order - no per-column
+    # bookkeeping or printing inside the loop
+    for c in df.columns:
+        if c in multi_set:
+            continue  # replaced by the one-hot columns appended in Step 5
+        out[c] = encoded_binary[c] if c in binary_set else df[c]
+
+    if binary_cols:
+        log.info("✅ Encoded %d binary features → 0/1", len(binary_cols))
 
     # === STEP 4: Convert Boolean Columns ===
-    # XGBoost requires integer inputs, not boolean
-    bool_cols = df.select_dtypes(include=["bool"]).columns.tolist()
+    # XGBoost requires integer inputs, not boolean.
+    # Bool columns can only be pass-throughs, so the cached dtype map suffices
+    bool_cols = [c for c in out if dtype_map.get(c) == bool]
     if bool_cols:
-        df[bool_cols] = df[bool_cols].astype(int)
-        print(f"🔄 Converted {len(bool_cols)} boolean columns to int: {bool_cols}")
+        for c in bool_cols:
+            out[c] = out[c].astype(int)
+        log.info("🔄 Converted %d boolean columns to int: %s", len(bool_cols), bool_cols)
 
     # === STEP 5: One-Hot Encoding for Multi-Category Features ===
-    # CRITICAL: drop_first=True prevents multicollinearity
+    # CRITICAL: drop='first' prevents multicollinearity (same as old drop_first=True)
     if multi_cols:
-        print(f"🌟 Applying one-hot encoding to {len(multi_cols)} multi-category columns...")
-        original_shape = df.shape
-        # Apply one-hot encoding with drop_first=True (same as serving)
-        df = pd.get_dummies(df, columns=multi_cols, drop_first=True)
-        
-        new_features = df.shape[1] - original_shape[1] + len(multi_cols)
-        print(f"✅ Created {new_features} new features from {len(multi_cols)} categorical columns")
-
-    # === STEP 6: Data Type Cleanup ===
-    # Convert nullable integers (Int64) to standard integers for XGBoost
-    for c in binary_cols:
-        if pd.api.types.is_integer_dtype(df[c]):
-            # Fill any NaN values with 0 and convert to int
-            df[c] = df[c].fillna(0).astype(int)
+        log.info("🌟 Applying one-hot encoding to %d multi-category columns...", len(multi_cols))
+        # Wide dummy blocks (many categories) are kept sparse; narrow ones use
+        # a dense preallocated uint8 matrix. Width is known from the
+        # cardinality pass: one column per category minus the dropped first.
+        expected_width = int(cardinality[multi_cols].sum()) - len(multi_cols)
+        use_sparse = expected_width > _DENSE_ONEHOT_MAX_COLS
 
-    
-    print(f"✅ Feature engineering complete: {df.shape[1]} final features")
-    return df
+        # sklearn's encoder writes one preallocated uint8 matrix in a single pass
+        # instead of materializing a separate column per category
+        encoder = OneHotEncoder(drop="first", dtype=np.uint8,
+                                sparse_output=use_sparse, handle_unknown="ignore")
+        encoded = encoder.fit_transform(cat_frame[multi_cols])
+        encoded_names = encoder.get_feature_names_out(multi_cols)
+        if use_sparse:
+            log.info("🪶 %d encoded columns > %d, keeping one-hot block sparse (CSR)", expected_width, _DENSE_ONEHOT_MAX_COLS)
+            dummies = pd.DataFrame.sparse.from_spmatrix(
+                encoded, index=df.index, columns=encoded_names)
+            for name in encoded_names:
+                out[name] = dummies[name]
+        else:
+            for i, name in enumerate(encoded_names):
+                out[name] = encoded[:, i]
+
+        # Persist the fitted encoder so serving uses the exact same mapping
+        if artifacts_dir is not None:
+            os.makedirs(artifacts_dir, exist_ok=True)
+            joblib.dump(encoder, os.path.join(artifacts_dir, "onehot_encoder.pkl"))
+            log.info("💾 One-hot encoder saved to %s", artifacts_dir)
+
+        log.info("✅ Created %d new features from %d categorical columns", len(encoded_names), len(multi_cols))
+
+    # === STEP 5b: Cache the Binary Encoding Schema ===
+    # Record which category maps to 1 for every binary feature so serving can
+    # apply the exact training mappings with one compare per column instead
+    # of re-deriving them per request
+    if artifacts_dir is not None and binary_cols:
+        os.makedirs(artifacts_dir, exist_ok=True)
+        schema = pd.DataFrame({
+            "feature": binary_cols,
+            "positive_value": [
+                _positive_value(set(cat_frame[c].cat.categories.astype(str)))
+                for c in binary_cols
+            ],
+        })
+        schema.to_parquet(os.path.join(artifacts_dir, "binary_schema.parquet"), index=False)
+        log.info("💾 Binary encoding schema saved to %s", artifacts_dir)
+
+    log.info("✅ Feature engineering complete: %d final features", len(out))
+    # copy=False assembles the collected columns without another full pass
+    return pd.DataFrame(out, index=df.index, copy=False)
 
 
     
@@ -2,7 +2,7 @@ import mlflow
 import pandas as pd 
 import mlflow.xgboost
 from xgboost import XGBClassifier
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedShuffleSplit
 from sklearn.metrics import recall_score,accuracy_score
 
 def train_model(df:pd.DataFrame,target_col:str = "Churn"):
@@ -17,11 +17,17 @@ def train_model(df:pd.DataFrame,target_col:str = "Churn"):
     X = df.drop(columns=[target_col])
     y = df[target_col]
 
-    X_train, X_test, y_train, y_test = train_test_split(X,y,test_size=0.2,random_state=42)
+    # Index-based stratified split: one take() per split instead of
+    # train_test_split slicing X and y separately
+    splitter = StratifiedShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+    train_idx, test_idx = next(splitter.split(X, y))
+    X_train, X_test = X.take(train_idx), X.take(test_idx)
+    y_train, y_test = y.take(train_idx), y.take(test_idx)
 
     params = { "n_estimators": 300,
                "learning_rate" : 0.1,
                "max_depth": 6,
+               "tree_method": "hist",
                "random_state": 42,
                "n_jobs": -1,
                "eval_metric": "logloss"
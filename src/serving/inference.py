@@ -25,6 +25,7 @@ Production Deployment:
 """
 
 import os
+import joblib
 import pandas as pd
 import mlflow
 
@@ -71,15 +72,44 @@ except Exception as e:
 # CRITICAL: These mappings must exactly match those used in training
 # Any changes here will cause train/serve skew and degrade model performance
 
-# Deterministic binary feature mappings (consistent with training)
-BINARY_MAP = {
-    "gender": {"Female": 0, "Male": 1},           # Demographics
-    "Partner": {"No": 0, "Yes": 1},               # Has partner
-    "Dependents": {"No": 0, "Yes": 1},            # Has dependents  
-    "PhoneService": {"No": 0, "Yes": 1},          # Phone service
-    "PaperlessBilling": {"No": 0, "Yes": 1},      # Billing preference
+# Deterministic binary feature mappings: the category that encodes to 1 per
+# column (everything else, including unknown values, encodes to 0 - exactly
+# like training). Used as fallback when no cached schema artifact is found.
+BINARY_POSITIVE = {
+    "gender": "Male",               # Demographics
+    "Partner": "Yes",               # Has partner
+    "Dependents": "Yes",            # Has dependents
+    "PhoneService": "Yes",          # Phone service
+    "PaperlessBilling": "Yes",      # Billing preference
 }
 
+# === BINARY SCHEMA LOADING ===
+# The training pipeline caches its binary-encoding schema as a parquet
+# artifact (build_features Step 5b). When present it replaces the hard-coded
+# fallback above, so serving always applies the exact training mappings.
+for _schema_path in (os.path.join(MODEL_DIR, "binary_schema.parquet"),
+                     os.path.join("artifacts", "binary_schema.parquet")):
+    if os.path.exists(_schema_path):
+        _schema = pd.read_parquet(_schema_path)
+        BINARY_POSITIVE = dict(zip(_schema["feature"], _schema["positive_value"]))
+        print(f"✅ Loaded binary encoding schema from {_schema_path}")
+        break
+
+# === ONE-HOT ENCODER LOADING ===
+# The training pipeline persists its fitted OneHotEncoder. Serving must use
+# it: get_dummies on a single-row frame only ever sees the row's own category
+# (which drop_first then removes), so it cannot reproduce training columns.
+ONEHOT_ENCODER = None
+for _encoder_path in (os.path.join(MODEL_DIR, "onehot_encoder.pkl"),
+                      os.path.join("artifacts", "onehot_encoder.pkl")):
+    if os.path.exists(_encoder_path):
+        ONEHOT_ENCODER = joblib.load(_encoder_path)
+        print(f"✅ Loaded one-hot encoder from {_encoder_path}")
+        break
+if ONEHOT_ENCODER is None:
+    print("⚠️  No one-hot encoder artifact found - falling back to get_dummies "
+          "(multi-category features will likely skew from training)")
+
 # Numeric columns that need type coercion
 NUMERIC_COLS = ["tenure", "MonthlyCharges", "TotalCharges"]
 
@@ -92,8 +122,8 @@ def _serve_transform(df: pd.DataFrame) -> pd.DataFrame:
     
     Transformation Pipeline:
     1. Clean column names and handle data types
-    2. Apply deterministic binary encoding (using BINARY_MAP)
-    3. One-hot encode remaining categorical features  
+    2. Apply deterministic binary encoding (using BINARY_POSITIVE)
+    3. One-hot encode remaining categoricals with the training-time encoder
     4. Convert boolean columns to integers
     5. Align features with training schema and order
     
@@ -122,26 +152,32 @@ def _serve_transform(df: pd.DataFrame) -> pd.DataFrame:
     
     # === STEP 2: Binary Feature Encoding ===
     # Apply deterministic mappings for binary features
-    # CRITICAL: Must use exact same mappings as training
-    for c, mapping in BINARY_MAP.items():
+    # CRITICAL: Must use exact same mappings as training - one compare
+    # against the positive category; unknown/missing values encode to 0
+    for c, positive in BINARY_POSITIVE.items():
         if c in df.columns:
-            df[c] = (
-                df[c]
-                .astype(str)                    # Convert to string
-                .str.strip()                    # Remove whitespace
-                .map(mapping)                   # Apply binary mapping
-                .astype("Int64")                # Handle NaN values
-                .fillna(0)                      # Fill unknown values with 0
-                .astype(int)                    # Final integer conversion
-            )
+            df[c] = (df[c].astype(str).str.strip() == positive).astype(int)
     
     # === STEP 3: One-Hot Encoding for Remaining Categorical Features ===
-    # Find remaining object/categorical columns (not in BINARY_MAP)
-    obj_cols = [c for c in df.select_dtypes(include=["object"]).columns]
-    if obj_cols:
-        # Apply one-hot encoding with drop_first=True (same as training)
-        # This prevents multicollinearity by dropping the first category
-        df = pd.get_dummies(df, columns=obj_cols, drop_first=True)
+    if ONEHOT_ENCODER is not None:
+        # Transform with the encoder fitted at training time so every request
+        # produces exactly the training dummy columns (unknown or missing
+        # categories encode to all zeros via handle_unknown='ignore')
+        enc_cols = list(ONEHOT_ENCODER.feature_names_in_)
+        for c in enc_cols:
+            if c not in df.columns:
+                df[c] = None
+        encoded = ONEHOT_ENCODER.transform(df[enc_cols].astype(str))
+        if hasattr(encoded, "toarray"):
+            encoded = encoded.toarray()  # densifying a single row is trivial
+        dummy_names = ONEHOT_ENCODER.get_feature_names_out(enc_cols)
+        dummies = pd.DataFrame(encoded, columns=dummy_names, index=df.index)
+        df = pd.concat([df.drop(columns=enc_cols), dummies], axis=1)
+    else:
+        # Fallback without an encoder artifact: legacy per-request dummies
+        obj_cols = [c for c in df.select_dtypes(include=["object"]).columns]
+        if obj_cols:
+            df = pd.get_dummies(df, columns=obj_cols, drop_first=True)
     
     # === STEP 4: Boolean to Integer Conversion ===
     # Convert any boolean columns to integers (XGBoost compatibility)